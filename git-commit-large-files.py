@@ -3,31 +3,81 @@ import sys
 import subprocess
 import time
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 import shutil
 import signal
-
-
-class GitBatchCommiter:
-    def __init__(self):
-        self.repo_path = None
-        self.original_cwd = os.getcwd()
-
-    def __enter__(self):
-        def signal_handler(sig, frame):
-            print(f"\n\n收到中断信号，正在清理...")
-            self.cleanup()
-            sys.exit(1)
-
-        signal.signal(signal.SIGINT, signal_handler)
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.cleanup()
-
-    def cleanup(self):
-        if os.getcwd() != self.original_cwd:
-            os.chdir(self.original_cwd)
+import glob
+import heapq
+import queue
+import threading
+import stat
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import groupby
+from operator import attrgetter
+
+FileInfo = namedtuple("FileInfo", "path size dir")
+
+
+class BackgroundPusher:
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.remote, self.remote_ref = get_push_target(repo_path)
+        self.pending = queue.Queue()
+        self.error = None
+        self.thread = None
+        if self.remote:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    @property
+    def active(self):
+        return self.thread is not None
+
+    def submit(self, commit_sha):
+        if self.thread and commit_sha:
+            self.pending.put(commit_sha)
+
+    def finish(self):
+        if self.thread:
+            self.pending.put(None)
+            self.thread.join()
+
+    def _run(self):
+        while True:
+            commit_sha = self.pending.get()
+            stop = commit_sha is None
+            while not self.pending.empty():
+                newer_sha = self.pending.get()
+                if newer_sha is None:
+                    stop = True
+                else:
+                    commit_sha = newer_sha
+            if commit_sha and self.error is None:
+                self._push(commit_sha)
+            if stop:
+                return
+
+    def _push(self, commit_sha):
+        push_command = [
+            "git",
+            "push",
+            self.remote,
+            f"{commit_sha}:{self.remote_ref}",
+        ]
+        try:
+            subprocess.run(
+                push_command,
+                cwd=self.repo_path,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=True,
+                encoding="utf-8",
+            )
+            print(f"  ↳ 后台推送 {commit_sha[:8]} 完成")
+        except subprocess.CalledProcessError as e:
+            self.error = e
+            print(f"  ↳ 后台推送 {commit_sha[:8]} 失败")
 
 
 def find_git_repo():
@@ -39,76 +89,37 @@ def find_git_repo():
     return None
 
 
-def get_git_status_files(repo_path):
+def get_git_status_files(repo_str):
     try:
-        original_cwd = os.getcwd()
-        os.chdir(repo_path)
-        result = subprocess.run(
-            ["git", "status", "--porcelain"],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding="utf-8",
-        )
-        files = []
-        for line in result.stdout.strip().split("\n"):
-            if not line.strip():
-                continue
-            parts = line.split()
-            if len(parts) < 2:
-                continue
-            filename = " ".join(parts[1:]).strip('"')
-            if "->" in line:
-                filename = line[line.find("->") + 2 :].strip().strip('"')
-            file_path = (repo_path / filename).resolve()
-            if file_path.exists() and file_path.is_dir():
-                dir_files = get_files_from_directory(file_path, repo_path)
-                files.extend(dir_files)
-            else:
-                files.append(
-                    {
-                        "path": str(file_path.relative_to(repo_path)),
-                        "size": (
-                            file_path.stat().st_size
-                            if file_path.exists() and file_path.is_file()
-                            else 0
-                        ),
-                        "dir": (
-                            str(file_path.parent.relative_to(repo_path))
-                            if file_path.parent != repo_path
-                            else "."
-                        ),
-                    }
-                )
-        os.chdir(original_cwd)
-        return files
+        commands = [
+            [
+                "git",
+                "ls-files",
+                "-z",
+                "--others",
+                "--modified",
+                "--deleted",
+                "--exclude-standard",
+            ],
+            ["git", "diff", "--cached", "--name-only", "--diff-filter=d", "-z"],
+        ]
+        paths = {}
+        for command in commands:
+            result = subprocess.run(
+                command, cwd=repo_str, capture_output=True, check=True
+            )
+            for raw_path in result.stdout.split(b"\x00"):
+                if raw_path:
+                    paths[os.fsdecode(raw_path)] = None
+        for path in paths:
+            try:
+                st = os.stat(os.path.join(repo_str, path))
+            except OSError:
+                st = None
+            size = st.st_size if st is not None and stat.S_ISREG(st.st_mode) else 0
+            yield FileInfo(path, size, path.rpartition("/")[0] or ".")
     except (subprocess.CalledProcessError, Exception) as e:
         print(f"获取Git状态错误: {e}")
-        return []
-
-
-def get_files_from_directory(directory, repo_path):
-    files = []
-    try:
-        for item in directory.iterdir():
-            if item.is_file():
-                files.append(
-                    {
-                        "path": str(item.relative_to(repo_path)),
-                        "size": item.stat().st_size,
-                        "dir": (
-                            str(item.parent.relative_to(repo_path))
-                            if item.parent != repo_path
-                            else "."
-                        ),
-                    }
-                )
-            elif item.is_dir() and item.name != ".git":
-                subdir_files = get_files_from_directory(item, repo_path)
-                files.extend(subdir_files)
-    except (OSError, PermissionError) as e:
-        print(f"访问目录 {directory} 时出错: {e}")
-    return files
 
 
 def get_git_files():
@@ -116,27 +127,28 @@ def get_git_files():
     if not repo_path:
         print("未找到Git仓库")
         return [], [], []
-    git_files = get_git_status_files(repo_path)
-    if not git_files:
-        return [], [], []
+    repo_str = os.fspath(repo_path)
+    git_files = get_git_status_files(repo_str)
     filtered_files = []
     skipped_files = []
     for file_info in git_files:
-        if file_info["size"] > 50 * 1024 * 1024:
-            print(f"跳过超过50M的文件: {file_info['path']}")
-            skipped_files.append(file_info["path"])
+        if file_info.size > 50 * 1024 * 1024:
+            print(f"跳过超过50M的文件: {file_info.path}")
+            skipped_files.append(file_info.path)
             continue
         filtered_files.append(file_info)
-    return filtered_files, repo_path, skipped_files
+    return filtered_files, repo_str, skipped_files
 
 
 def organize_files_by_directory(git_files):
-    dir_files = defaultdict(list)
-    dir_sizes = defaultdict(int)
-    for file_info in git_files:
-        dir_path = file_info["dir"]
-        dir_files[dir_path].append(file_info)
-        dir_sizes[dir_path] += file_info["size"]
+    files_sorted = sorted(git_files, key=attrgetter("dir"))
+    dir_files = {
+        dir_path: list(files)
+        for dir_path, files in groupby(files_sorted, key=attrgetter("dir"))
+    }
+    dir_sizes = {
+        dir_path: sum(f.size for f in files) for dir_path, files in dir_files.items()
+    }
     return dir_files, dir_sizes
 
 
@@ -144,60 +156,87 @@ def create_batches(git_files, max_batch_size=100 * 1024 * 1024):
     if not git_files:
         return []
     dir_files, dir_sizes = organize_files_by_directory(git_files)
+    items = []
+    for dir_path, dir_size in dir_sizes.items():
+        if dir_size <= max_batch_size:
+            items.append((dir_size, dir_files[dir_path]))
+        else:
+            items.extend((f.size, [f]) for f in dir_files[dir_path])
+    items.sort(key=lambda item: item[0], reverse=True)
     batches = []
-    sorted_dirs = sorted(dir_sizes.keys(), key=lambda d: dir_sizes[d])
-    for dir_path in sorted_dirs[:]:
-        if dir_sizes[dir_path] <= max_batch_size:
-            batches.append(dir_files[dir_path])
-            sorted_dirs.remove(dir_path)
-    sorted_dirs = sorted(sorted_dirs, key=lambda d: dir_sizes[d], reverse=True)
-    for dir_path in sorted_dirs:
-        files = dir_files[dir_path]
-        current_batch = []
-        current_batch_size = 0
-        files.sort(key=lambda x: x["size"], reverse=True)
-        for file_info in files:
-            if current_batch_size + file_info["size"] <= max_batch_size:
-                current_batch.append(file_info)
-                current_batch_size += file_info["size"]
-            else:
-                if current_batch:
-                    batches.append(current_batch)
-                current_batch = [file_info]
-                current_batch_size = file_info["size"]
-        if current_batch:
-            batches.append(current_batch)
+    free_space = []
+    for item_size, files in items:
+        if free_space and -free_space[0][0] >= item_size:
+            remaining, batch_index = heapq.heappop(free_space)
+            batches[batch_index].extend(files)
+            heapq.heappush(free_space, (remaining + item_size, batch_index))
+        else:
+            batches.append(list(files))
+            heapq.heappush(free_space, (item_size - max_batch_size, len(batches) - 1))
     return batches
 
 
-def simplify_batch_files(batch_files, repo_path, all_git_files):
+def simplify_batch_files(batch_files, repo_str, all_dir_paths):
     dir_files = defaultdict(list)
     for file_info in batch_files:
-        dir_path = file_info["dir"]
+        dir_path = file_info.dir
         dir_files[dir_path].append(file_info)
+    batch_paths = {f.path for f in batch_files}
     simplified_files = []
     simplified_dirs = []
-    all_dir_files, _ = organize_files_by_directory(all_git_files)
     for dir_path, files in dir_files.items():
         if dir_path == ".":
-            simplified_files.extend([f["path"] for f in files])
+            simplified_files.extend([f.path for f in files])
             continue
-        batch_files_in_dir = set(f["path"] for f in files)
-        all_files_in_dir = set(f["path"] for f in all_dir_files.get(dir_path, []))
-        if batch_files_in_dir == all_files_in_dir:
+        all_files_under_dir = all_dir_paths.get(dir_path, frozenset())
+        if len(all_files_under_dir) > len(batch_paths):
+            simplified_files.extend([f.path for f in files])
+            continue
+        if all_files_under_dir <= batch_paths:
             simplified_dirs.append(dir_path)
         else:
-            simplified_files.extend([f["path"] for f in files])
+            simplified_files.extend([f.path for f in files])
+    collapsed_dirs = set(simplified_dirs)
+    simplified_dirs = [
+        d for d in simplified_dirs if not has_collapsed_parent(d, collapsed_dirs)
+    ]
     return simplified_files, simplified_dirs
 
 
-def create_commit_message_file(original_commit_info_file, batch_index, total_batches):
+def has_collapsed_parent(path, collapsed_dirs):
+    parent = path.rpartition("/")[0]
+    while parent:
+        if parent in collapsed_dirs:
+            return True
+        parent = parent.rpartition("/")[0]
+    return False
+
+
+def get_dir_paths(paths):
+    paths_under_dir = defaultdict(set)
+    for path in paths:
+        parent = path.rpartition("/")[0]
+        while parent:
+            paths_under_dir[parent].add(path)
+            parent = parent.rpartition("/")[0]
+    return {
+        dir_path: frozenset(dir_paths)
+        for dir_path, dir_paths in paths_under_dir.items()
+    }
+
+
+def read_commit_message(commit_info_file):
     try:
-        with open(original_commit_info_file, "r", encoding="utf-8") as f:
-            original_message = f.read().strip()
+        with open(commit_info_file, "r", encoding="utf-8") as f:
+            return f.read().strip()
     except UnicodeDecodeError:
-        with open(original_commit_info_file, "r", encoding="gbk") as f:
-            original_message = f.read().strip()
+        with open(commit_info_file, "r", encoding="gbk") as f:
+            return f.read().strip()
+
+
+def create_commit_message_file(
+    original_commit_info_file, original_message, batch_index, total_batches
+):
     if total_batches == 1:
         return original_commit_info_file, original_message
     suffix = f" (批次 {batch_index}/{total_batches})"
@@ -207,84 +246,120 @@ def create_commit_message_file(original_commit_info_file, batch_index, total_bat
         new_message = original_message + suffix
     temp_file_path = f"{original_commit_info_file}.batch{batch_index}"
     try:
-        with open(temp_file_path, "w", encoding="utf-8") as f:
-            f.write(new_message)
+        Path(temp_file_path).write_text(new_message, encoding="utf-8")
     except Exception as e:
         print(f"创建临时提交信息文件失败: {e}")
         return original_commit_info_file, original_message
     return temp_file_path, new_message
 
 
-def cleanup_temp_files(original_commit_info_file, total_batches):
-    for i in range(1, total_batches + 1):
-        temp_file_path = f"{original_commit_info_file}.batch{i}"
-        if os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-            except OSError:
-                pass
-
-
-def batch_git_add_files(file_paths, repo_path, max_command_length=32000):
-    if not file_paths:
-        return True, 0, 0
-    batches = []
-    current_batch = []
-    current_length = 0
-    base_command_length = len("git add ")
-    for file_path in file_paths:
-        file_length = len(file_path) + 1
-        if current_length + file_length + base_command_length > max_command_length:
-            if current_batch:
-                batches.append(current_batch)
-            current_batch = [file_path]
-            current_length = file_length
-        else:
-            current_batch.append(file_path)
-            current_length += file_length
-    if current_batch:
-        batches.append(current_batch)
-    total_add_time = 0
-    batch_times = []
-    for i, batch in enumerate(batches):
-        add_command = ["git", "add"] + batch
-        print(f"执行: git add [批次 {i+1}/{len(batches)}, 包含 {len(batch)} 个文件]")
-        print(batch)
+def cleanup_temp_files(original_commit_info_file):
+    prefix = f"{original_commit_info_file}.batch"
+    for temp_file_path in glob.glob(f"{glob.escape(prefix)}[0-9]*"):
+        suffix = temp_file_path[len(prefix) :]
+        if not (suffix.isascii() and suffix.isdigit()):
+            continue
         try:
-            start_time = time.time()
+            os.remove(temp_file_path)
+        except OSError:
+            pass
+
+
+def write_git_objects(file_paths, repo_path):
+    max_workers = max(1, min(8, (os.cpu_count() or 4) * 3 // 4))
+    chunks = [file_paths[i::max_workers] for i in range(max_workers)]
+
+    def hash_chunk(chunk):
+        paths = [
+            p
+            for p in chunk
+            if not p.startswith('"')
+            and "\n" not in p
+            and os.path.isfile(os.path.join(repo_path, p))
+        ]
+        if paths:
             subprocess.run(
-                add_command,
-                capture_output=True,
+                ["git", "hash-object", "-w", "--stdin-paths"],
+                input="\n".join(paths) + "\n",
+                cwd=repo_path,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True,
                 check=True,
                 encoding="utf-8",
             )
-            end_time = time.time()
-            batch_time = end_time - start_time
-            batch_times.append(batch_time)
-            total_add_time += batch_time
-            print(f"  ↳ 耗时: {batch_time:.2f} 秒")
-        except subprocess.CalledProcessError as e:
-            print(f"Git add 执行失败: {e}")
-            stderr_output = e.stderr.strip() if e.stderr else ""
-            if stderr_output:
-                print(f"错误信息: {stderr_output}")
-            return False, total_add_time, batch_times
-    print(f"git add 总耗时: {total_add_time:.2f} 秒 ({len(batches)} 个批次)")
+
+    first_error = None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(hash_chunk, chunk) for chunk in chunks if chunk]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                if first_error is None:
+                    first_error = e
+    if first_error is not None:
+        print(f"Git hash-object 执行失败，继续执行 git add: {first_error}")
+        stderr_output = getattr(first_error, "stderr", None)
+        if stderr_output and stderr_output.strip():
+            print(f"错误信息: {stderr_output.strip()}")
+
+
+def batch_git_add_files(file_paths, repo_path, object_paths):
+    if not file_paths:
+        return True, 0, 0
+    total_add_time = 0
+    batch_times = []
+    start_time = time.time()
+    write_git_objects(object_paths, repo_path)
+    hash_time = time.time() - start_time
+    total_add_time += hash_time
+    print(f"并行写入对象耗时: {hash_time:.2f} 秒")
+    add_command = ["git", "add", "--pathspec-from-file=-", "--pathspec-file-nul"]
+    print(f"执行: {' '.join(add_command)} [包含 {len(file_paths)} 个文件]")
+    print(file_paths)
+    try:
+        start_time = time.time()
+        subprocess.run(
+            add_command,
+            input="\x00".join(file_paths),
+            cwd=repo_path,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=True,
+            encoding="utf-8",
+        )
+        end_time = time.time()
+        batch_time = end_time - start_time
+        batch_times.append(batch_time)
+        total_add_time += batch_time
+        print(f"  ↳ 耗时: {batch_time:.2f} 秒")
+    except subprocess.CalledProcessError as e:
+        print(f"Git add 执行失败: {e}")
+        stderr_output = e.stderr.strip() if e.stderr else ""
+        if stderr_output:
+            print(f"错误信息: {stderr_output}")
+        return False, total_add_time, batch_times
+    print(f"git add 总耗时: {total_add_time:.2f} 秒")
     return True, total_add_time, batch_times
 
 
 def execute_git_add_commit(
-    files, commit_info_file, repo_path, all_git_files, batch_index, total_batches
+    files,
+    simplified_files,
+    simplified_dirs,
+    commit_info_file,
+    original_message,
+    repo_path,
+    batch_index,
+    total_batches,
 ):
-    if not files:
+    if not simplified_files and not simplified_dirs:
         print("没有文件需要提交")
         return False, 0, []
     temp_commit_file, commit_message = create_commit_message_file(
-        commit_info_file, batch_index, total_batches
-    )
-    simplified_files, simplified_dirs = simplify_batch_files(
-        files, repo_path, all_git_files
+        commit_info_file, original_message, batch_index, total_batches
     )
     if simplified_files:
         print(f"提交文件: {len(simplified_files)} 个")
@@ -295,18 +370,22 @@ def execute_git_add_commit(
     print(f"提交信息: {commit_message}")
     all_paths = simplified_files + simplified_dirs
     try:
-        original_cwd = os.getcwd()
-        os.chdir(repo_path)
-        add_success, add_time, batch_times = batch_git_add_files(all_paths, repo_path)
+        add_success, add_time, batch_times = batch_git_add_files(
+            all_paths, repo_path, [f.path for f in files]
+        )
         if not add_success:
             print("文件添加失败")
-            os.chdir(original_cwd)
             return False, add_time, batch_times
-        commit_command = ["git", "commit", "-F", temp_commit_file]
+        commit_command = ["git", "commit", "-F", os.path.abspath(temp_commit_file)]
         print(f"执行: {' '.join(commit_command)}")
         commit_start_time = time.time()
         result = subprocess.run(
-            commit_command, capture_output=True, text=True, check=True, encoding="utf-8"
+            commit_command,
+            cwd=repo_path,
+            capture_output=True,
+            text=True,
+            check=True,
+            encoding="utf-8",
         )
         commit_end_time = time.time()
         commit_time = commit_end_time - commit_start_time
@@ -315,7 +394,6 @@ def execute_git_add_commit(
             print(f"提交结果: {stdout_output}")
         print(f"git commit 耗时: {commit_time:.2f} 秒")
         print(f"本批次总耗时: {add_time + commit_time:.2f} 秒")
-        os.chdir(original_cwd)
         return True, add_time + commit_time, batch_times
     except subprocess.CalledProcessError as e:
         print(f"Git命令执行失败: {e}")
@@ -338,15 +416,59 @@ def execute_git_add_commit(
                 pass
 
 
+def get_push_target(repo_path):
+    def git_output(*args):
+        result = subprocess.run(
+            ["git", *args],
+            cwd=repo_path,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+        )
+        return result.stdout.strip() if result.returncode == 0 else ""
+
+    branch_ref = git_output("symbolic-ref", "HEAD")
+    if not branch_ref:
+        return None, None
+    push_info = git_output(
+        "for-each-ref", "--format=%(push:remotename) %(push)", branch_ref
+    )
+    remote, _, tracking_ref = push_info.partition(" ")
+    tracking_prefix = f"refs/remotes/{remote}/"
+    if not remote or not tracking_ref.startswith(tracking_prefix):
+        return None, None
+    fetch_specs = git_output("config", "--get-all", f"remote.{remote}.fetch")
+    default_spec = f"refs/heads/*:{tracking_prefix}*"
+    if not any(
+        spec.lstrip("+") == default_spec for spec in fetch_specs.splitlines()
+    ):
+        return None, None
+    return remote, "refs/heads/" + tracking_ref[len(tracking_prefix) :]
+
+
+def get_head_commit(repo_path):
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=repo_path,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
 def execute_git_push(repo_path):
     try:
-        original_cwd = os.getcwd()
-        os.chdir(repo_path)
         push_command = ["git", "push"]
         print(f"执行: {' '.join(push_command)}")
         push_start_time = time.time()
         result = subprocess.run(
-            push_command, capture_output=True, text=True, check=True, encoding="utf-8"
+            push_command,
+            cwd=repo_path,
+            capture_output=True,
+            text=True,
+            check=True,
+            encoding="utf-8",
         )
         push_end_time = time.time()
         push_time = push_end_time - push_start_time
@@ -354,7 +476,6 @@ def execute_git_push(repo_path):
         if stdout_output:
             print(f"推送结果: {stdout_output}")
         print(f"git push 耗时: {push_time:.2f} 秒")
-        os.chdir(original_cwd)
         return True, push_time
     except subprocess.CalledProcessError as e:
         print(f"Git push执行失败: {e}")
@@ -375,105 +496,127 @@ def main():
     if not os.path.exists(commit_info_file):
         print(f"错误: 文件 {commit_info_file} 不存在")
         sys.exit(1)
-    with GitBatchCommiter() as commiter:
-        git_files, repo_path, skipped_files = get_git_files()
-        commiter.repo_path = repo_path
-        if not git_files and not skipped_files:
-            print("没有需要提交的文件")
-            return
-        if skipped_files:
-            print(f"\n发现 {len(skipped_files)} 个超过50M的文件，已跳过这些文件")
-        if not git_files:
-            print("没有需要提交的文件")
-            return
-        total_size = sum(f["size"] for f in git_files)
+
+    def signal_handler(sig, frame):
+        print("\n\n收到中断信号，正在清理临时文件...")
+        cleanup_temp_files(commit_info_file)
+        sys.exit(1)
+
+    signal.signal(signal.SIGINT, signal_handler)
+    git_files, repo_path, skipped_files = get_git_files()
+    if not git_files and not skipped_files:
+        print("没有需要提交的文件")
+        return
+    if skipped_files:
+        print(f"\n发现 {len(skipped_files)} 个超过50M的文件，已跳过这些文件")
+    if not git_files:
+        print("没有需要提交的文件")
+        return
+    total_size = sum(f.size for f in git_files)
+    print(
+        f"检测到 {len(git_files)} 个需要提交的文件，总大小: {total_size / 1024 / 1024:.2f} MB"
+    )
+    batches = create_batches(git_files)
+    if not batches:
+        print("没有需要提交的文件")
+        return
+    total_batches = len(batches)
+    all_dir_paths = get_dir_paths([f.path for f in git_files] + skipped_files)
+    original_message = read_commit_message(commit_info_file)
+    print(f"\n将分 {total_batches} 批进行提交")
+    print("\n批次概览:")
+    precomputed = []
+    for i, batch in enumerate(batches, 1):
+        batch_size = sum(f.size for f in batch)
+        simplified_files, simplified_dirs = simplify_batch_files(
+            batch, repo_path, all_dir_paths
+        )
+        precomputed.append((simplified_files, simplified_dirs, batch_size))
+        file_count = len(simplified_files)
+        dir_count = len(simplified_dirs)
         print(
-            f"检测到 {len(git_files)} 个需要提交的文件，总大小: {total_size / 1024 / 1024:.2f} MB"
+            f"  批次 {i}: {len(batch)} 个文件, {batch_size / 1024 / 1024:.2f} MB -> {file_count} 个文件, {dir_count} 个文件夹"
         )
-        batches = create_batches(git_files)
-        if not batches:
-            print("没有需要提交的文件")
-            return
-        total_batches = len(batches)
-        print(f"\n将分 {total_batches} 批进行提交")
-        print("\n批次概览:")
+    successful_batches = 0
+    total_processing_time = 0
+    all_batch_times = []
+    pusher = BackgroundPusher(repo_path)
+    try:
         for i, batch in enumerate(batches, 1):
-            batch_size = sum(f["size"] for f in batch)
-            simplified_files, simplified_dirs = simplify_batch_files(
-                batch, repo_path, git_files
-            )
-            file_count = len(simplified_files)
-            dir_count = len(simplified_dirs)
+            simplified_files, simplified_dirs, batch_size = precomputed[i - 1]
+            print(f"\n{'='*50}")
+            print(f"第 {i}/{total_batches} 批提交")
+            print(f"{'='*50}")
+            print(f"文件数量: {len(batch)} 个")
+            print(f"批次大小: {batch_size / 1024 / 1024:.2f} MB")
             print(
-                f"  批次 {i}: {len(batch)} 个文件, {batch_size / 1024 / 1024:.2f} MB -> {file_count} 个文件, {dir_count} 个文件夹"
+                f"简化后: {len(simplified_files)} 个文件, {len(simplified_dirs)} 个文件夹"
             )
-        successful_batches = 0
-        total_processing_time = 0
-        all_batch_times = []
-        try:
-            for i, batch in enumerate(batches, 1):
-                batch_size = sum(f["size"] for f in batch)
-                simplified_files, simplified_dirs = simplify_batch_files(
-                    batch, repo_path, git_files
-                )
-                print(f"\n{'='*50}")
-                print(f"第 {i}/{total_batches} 批提交")
-                print(f"{'='*50}")
-                print(f"文件数量: {len(batch)} 个")
-                print(f"批次大小: {batch_size / 1024 / 1024:.2f} MB")
+            batch_start_time = time.time()
+            success, batch_time, batch_times = execute_git_add_commit(
+                batch,
+                simplified_files,
+                simplified_dirs,
+                commit_info_file,
+                original_message,
+                repo_path,
+                i,
+                total_batches,
+            )
+            batch_end_time = time.time()
+            total_batch_time = batch_end_time - batch_start_time
+            if success:
+                successful_batches += 1
+                total_processing_time += batch_time
+                all_batch_times.extend(batch_times)
+                if pusher.active:
+                    pusher.submit(get_head_commit(repo_path))
                 print(
-                    f"简化后: {len(simplified_files)} 个文件, {len(simplified_dirs)} 个文件夹"
-                )
-                batch_start_time = time.time()
-                success, batch_time, batch_times = execute_git_add_commit(
-                    batch, commit_info_file, repo_path, git_files, i, total_batches
+                    f"✓ 第 {i}/{total_batches} 批提交成功 (实际耗时: {total_batch_time:.2f} 秒)"
                 )
-                batch_end_time = time.time()
-                total_batch_time = batch_end_time - batch_start_time
-                if success:
-                    successful_batches += 1
-                    total_processing_time += batch_time
-                    all_batch_times.extend(batch_times)
-                    print(
-                        f"✓ 第 {i}/{total_batches} 批提交成功 (实际耗时: {total_batch_time:.2f} 秒)"
-                    )
-                else:
-                    print(f"✗ 第 {i}/{total_batches} 批提交失败，停止执行")
-                    break
-            if successful_batches == total_batches:
-                print(f"\n{'='*50}")
-                print("所有批次提交成功，开始推送到远程仓库")
-                print(f"{'='*50}")
-                push_success, push_time = execute_git_push(repo_path)
-                if push_success:
-                    print("✓ 所有更改已成功推送到远程仓库")
-                else:
-                    print("✗ 推送失败")
             else:
-                print(f"\n{'='*50}")
-                print("提交过程中出现问题，未执行推送")
-                print(f"成功提交: {successful_batches}/{total_batches} 批")
-                print(f"{'='*50}")
-        except KeyboardInterrupt:
-            print(
-                f"\n\n用户中断执行，已成功提交 {successful_batches}/{total_batches} 批"
-            )
-            sys.exit(1)
-        print(f"\n{'='*60}")
-        print("执行统计:")
-        print(f"{'='*60}")
-        print(f"总批次数: {total_batches}")
-        print(f"成功批次数: {successful_batches}")
-        if all_batch_times:
-            print(f"git add 批次数量: {len(all_batch_times)}")
-            print(
-                f"git add 平均耗时: {sum(all_batch_times)/len(all_batch_times):.2f} 秒"
+                print(f"✗ 第 {i}/{total_batches} 批提交失败，停止执行")
+                break
+        pusher.finish()
+        if pusher.error is not None:
+            stderr_output = (
+                pusher.error.stderr.strip() if pusher.error.stderr else ""
             )
-            print(f"git add 最长耗时: {max(all_batch_times):.2f} 秒")
-            print(f"git add 最短耗时: {min(all_batch_times):.2f} 秒")
-        print(f"总处理时间: {total_processing_time:.2f} 秒")
-        print(f"{'='*60}")
-        cleanup_temp_files(commit_info_file, total_batches)
+            print(f"\n✗ 后台推送失败: {stderr_output or pusher.error}")
+        if successful_batches == total_batches:
+            print(f"\n{'='*50}")
+            print("所有批次提交成功，开始推送到远程仓库")
+            print(f"{'='*50}")
+            push_success, push_time = execute_git_push(repo_path)
+            if push_success:
+                print("✓ 所有更改已成功推送到远程仓库")
+            else:
+                print("✗ 推送失败")
+        else:
+            print(f"\n{'='*50}")
+            print("提交过程中出现问题，未执行最终推送")
+            print(f"成功提交: {successful_batches}/{total_batches} 批")
+            print(f"{'='*50}")
+    except KeyboardInterrupt:
+        print(
+            f"\n\n用户中断执行，已成功提交 {successful_batches}/{total_batches} 批"
+        )
+        sys.exit(1)
+    print(f"\n{'='*60}")
+    print("执行统计:")
+    print(f"{'='*60}")
+    print(f"总批次数: {total_batches}")
+    print(f"成功批次数: {successful_batches}")
+    if all_batch_times:
+        print(f"git add 批次数量: {len(all_batch_times)}")
+        print(
+            f"git add 平均耗时: {sum(all_batch_times)/len(all_batch_times):.2f} 秒"
+        )
+        print(f"git add 最长耗时: {max(all_batch_times):.2f} 秒")
+        print(f"git add 最短耗时: {min(all_batch_times):.2f} 秒")
+    print(f"总处理时间: {total_processing_time:.2f} 秒")
+    print(f"{'='*60}")
+    cleanup_temp_files(commit_info_file)
 
 
 if __name__ == "__main__":